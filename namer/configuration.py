@@ -502,6 +502,7 @@ class NamerConfig:
     vph: VideoPerceptualHash = StashVideoPerceptualHash()  # type: ignore
     vph_alt: VideoPerceptualHash = VideoPerceptualHash(ffmpeg)
     re_cleanup: List[Pattern]
+    re_cleanup_combined: Pattern
 
     def __init__(self):
         if sys.platform != 'win32':
@@ -509,6 +510,8 @@ class NamerConfig:
             self.set_gid = os.getgid()
 
         self.re_cleanup = [re.compile(rf'\b{regex}\b', re.IGNORECASE) for regex in database.re_cleanup]
+        # All cleanup patterns as one alternation, so a name is cleaned in a single pass.
+        self.re_cleanup_combined = re.compile('|'.join(f'(?:{regex.pattern})' for regex in self.re_cleanup), re.IGNORECASE)
 
         if hasattr(self, 'watch_dir'):
             self.watch_dir = self.watch_dir.resolve()
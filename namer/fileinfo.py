@@ -3,9 +3,10 @@ Parse string in to FileNamePart define in namer_types.
 """
 
 from dataclasses import dataclass
+from functools import lru_cache
+import os
 import re
-from pathlib import PurePath
-from typing import List, Optional, Pattern
+from typing import Dict, List, Optional, Pattern, Tuple
 
 from loguru import logger
 
@@ -14,8 +15,27 @@ from namer.videophash import PerceptualHash
 
 DEFAULT_REGEX_TOKENS = '{_site}{_sep}{_optional_date}{_ts}{_name}{_dot}{_ext}'
 
+_BRACKETS_RE = re.compile(r'\[.*?\]')
+_TPDB_RE = re.compile(r'\[(?:the)?porndbid=(\d+)\]', re.IGNORECASE)
+_JAV_RE = re.compile(r'([a-zA-Z]{2,5}-\d{3,5})', re.IGNORECASE)
+_DID_MILF_RE = re.compile(r'\b((?:did|milf)\-?\d{2,4})\b', re.IGNORECASE)
 
-@dataclass(init=False, repr=False, eq=True, order=False, unsafe_hash=True, frozen=False)
+
+@dataclass(frozen=True, eq=False)
+class _CombinedAbbreviations:
+    """
+    A site abbreviation dict joined in to one alternation, hashed by identity so it can key memoized lookups.
+    """
+    site_abbreviations: Dict[Pattern, str]
+    combined: Pattern
+    abbreviations: List[Tuple[Pattern, str]]
+
+
+# Combined site abbreviation regexes, keyed by id() of the NamerConfig.site_abbreviations dict they were built from.
+_ABBREVIATIONS_CACHE: Dict[int, _CombinedAbbreviations] = {}
+
+
+@dataclass(init=True, repr=False, eq=True, order=False, unsafe_hash=True, frozen=False, slots=True)
 class FileInfo:
     """
     Represents info parsed from a file name.
@@ -45,23 +65,24 @@ class FileInfo:
         """
 
 
-def name_cleaner(name: str, re_cleanup: List[Pattern]) -> str:
+def name_cleaner(name: str, re_cleanup: Pattern) -> str:
     """
     Given the name parts, following a date, but preceding the file extension, attempt to glean
     extra information and discard useless information for matching with the porndb.
     """
     # --- NEW: Remove text inside square brackets [] ---
-    name = re.sub(r'\[.*?\]', '', name)
+    name = _BRACKETS_RE.sub('', name)
     
-    for regex in re_cleanup:
-        name = regex.sub('', name)
+    name = re_cleanup.sub('', name)
 
     name = name.replace('.', ' ')
+    # split/join is cheaper than a regex for collapsing whitespace.
     name = ' '.join(name.split()).strip('-')
 
     return name
 
 
+@lru_cache(maxsize=8)
 def parser_config_to_regex(tokens: str) -> Pattern[str]:
     _sep = r'[\.\- ]+'
     _site = r'(?P<site>.*?)'
@@ -83,28 +104,27 @@ def parser_config_to_regex(tokens: str) -> Pattern[str]:
 def parse_file_name(filename: str, namer_config: NamerConfig) -> FileInfo:
     file_name_parts = FileInfo()
     file_name_parts.source_file_name = filename
-    path = PurePath(filename)
-    stem = path.stem
-    
-    # Use the robustly parsed extension from PurePath
-    file_name_parts.extension = path.suffix[1:] if path.suffix else ''
+    # os.path.splitext gives the same stem/extension split as PurePath without building a path object.
+    root, suffix = os.path.splitext(filename)
+    stem = os.path.basename(root)
+    file_name_parts.extension = suffix[1:]
 
     # --- SUPER-PRIORITY: Look for a TPDB ID tag first ---
-    tpdb_regex = re.compile(r'\[(?:the)?porndbid=(\d+)\]', re.IGNORECASE)
-    tpdb_match = tpdb_regex.search(stem)
-    if tpdb_match:
-        file_name_parts.tpdb_id = int(tpdb_match.group(1))
-        logger.info('Found ThePornDB ID in filename: {}', file_name_parts.tpdb_id)
-        # We have the ID and extension, which is all we need for a direct lookup.
-        return file_name_parts
+    # Cheap substring check so the regex only runs on stems that can contain the tag.
+    if 'porndbid=' in stem.lower():
+        tpdb_match = _TPDB_RE.search(stem)
+        if tpdb_match:
+            file_name_parts.tpdb_id = int(tpdb_match.group(1))
+            logger.info('Found ThePornDB ID in filename: {}', file_name_parts.tpdb_id)
+            # We have the ID and extension, which is all we need for a direct lookup.
+            return file_name_parts
 
     # --- Original Code Extraction (fallback on the stem) ---
     found_code, code_type = None, None
     forbidden_prefixes = ['WEBDL']
     forbidden_resolutions = ['2160', '1080', '720', '480', '360']
     
-    jav_regex = re.compile(r'([a-zA-Z]{2,5}-\d{3,5})', re.IGNORECASE)
-    potential_codes = jav_regex.findall(stem)
+    potential_codes = _JAV_RE.findall(stem)
     if potential_codes:
         for code in potential_codes:
             num_part = code.split('-')[-1]
@@ -113,8 +133,7 @@ def parse_file_name(filename: str, namer_config: NamerConfig) -> FileInfo:
                 break
     
     if not found_code:
-        did_milf_regex = re.compile(r'\b((?:did|milf)\-?\d{2,4})\b', re.IGNORECASE)
-        match = did_milf_regex.search(stem)
+        match = _DID_MILF_RE.search(stem)
         if match:
             found_code, code_type = match.group(1).lower(), 'SCENE_MOVIE_ID'
 
@@ -128,26 +147,62 @@ def parse_file_name(filename: str, namer_config: NamerConfig) -> FileInfo:
     regex = parser_config_to_regex(namer_config.name_parser)
     match = regex.search(filename_with_abbreviations)
     if match:
-        if match.groupdict().get('year'):
-            prefix = '20' if len(match.group('year')) == 2 else ''
-            file_name_parts.date = prefix + match.group('year') + '-' + match.group('month') + '-' + match.group('day')
-        if match.groupdict().get('name'):
-            file_name_parts.name = name_cleaner(match.group('name'), namer_config.re_cleanup)
-        if match.groupdict().get('site'):
-            file_name_parts.site = match.group('site')
-        if match.groupdict().get('trans'):
-            trans = match.group('trans')
-            file_name_parts.trans = bool(trans and trans.strip().upper() == 'TS')
-        # We ignore the regex 'ext' group and stick with our more reliable PurePath extension.
+        # Custom name_parser tokens may leave groups out, so look them up in a single groupdict rather than match.group().
+        groups = match.groupdict()
+        year = groups.get('year')
+        if year:
+            prefix = '20' if len(year) == 2 else ''
+            file_name_parts.date = prefix + year + '-' + groups['month'] + '-' + groups['day']
+        name = groups.get('name')
+        if name:
+            file_name_parts.name = name_cleaner(name, namer_config.re_cleanup_combined)
+        site = groups.get('site')
+        if site:
+            file_name_parts.site = site
+        trans = groups.get('trans')
+        if trans:
+            file_name_parts.trans = trans.strip().upper() == 'TS'
+        # We ignore the regex 'ext' group and stick with our more reliable os.path.splitext extension.
     else:
         logger.debug('Could not parse site/date/name from filename: {}', filename)
 
     return file_name_parts
 
 
-def replace_abbreviations(text: str, namer_config: NamerConfig):
-    for abbreviation, full in namer_config.site_abbreviations.items():
-        if abbreviation.match(text):
-            text = abbreviation.sub(full, text, 1)
-            break
+def __combined_abbreviations(site_abbreviations: Dict[Pattern, str]) -> _CombinedAbbreviations:
+    """
+    Joins all site abbreviation patterns in to a single alternation, so a file name is scanned once rather than
+    once per abbreviation.   Built once per abbreviation dict and reused for every file parsed with it.
+    """
+    cached = _ABBREVIATIONS_CACHE.get(id(site_abbreviations))
+    if cached and cached.site_abbreviations is site_abbreviations:
+        return cached
+
+    abbreviations = list(site_abbreviations.items())
+    combined = re.compile('|'.join(f'(?P<a{index}>{abbreviation.pattern})' for index, (abbreviation, _) in enumerate(abbreviations)), re.IGNORECASE)
+    built = _CombinedAbbreviations(site_abbreviations, combined, abbreviations)
+
+    if len(_ABBREVIATIONS_CACHE) >= 8:
+        _ABBREVIATIONS_CACHE.clear()
+    _ABBREVIATIONS_CACHE[id(site_abbreviations)] = built
+
+    return built
+
+
+@lru_cache(maxsize=4096)
+def __abbreviate(text: str, combined_abbreviations: _CombinedAbbreviations) -> str:
+    """
+    Memoized per file name, directory scans and the web ui parse the same names over and over.
+    """
+    match = combined_abbreviations.combined.match(text)
+    if match and match.lastgroup:
+        abbreviation, full = combined_abbreviations.abbreviations[int(match.lastgroup[1:])]
+        text = abbreviation.sub(full, text, 1)
     return text
+
+
+def replace_abbreviations(text: str, namer_config: NamerConfig):
+    if not namer_config.site_abbreviations:
+        return text
+
+    return __abbreviate(text, __combined_abbreviations(namer_config.site_abbreviations))
@@ -1,10 +1,16 @@
 import re
 import string
+from functools import lru_cache
 
 from jinja2 import Template
 from jinja2.filters import FILTERS
 
 
+@lru_cache(maxsize=128)
+def _jinja_template(format_spec: str) -> Template:
+    return Template(f'{{{{ val{format_spec} }}}}')
+
+
 class PartialFormatter(string.Formatter):
     """
     Used for formatting NamerConfig.inplace_name and NamerConfig.
@@ -17,11 +23,9 @@ class PartialFormatter(string.Formatter):
         'resolution', 'video_codec', 'audio_codec', 'external_id', 'fps',
     ]
 
-    __regex = {
-        's': re.compile(r'.\d+s'),
-        'p': re.compile(r'.\d+p'),
-        'i': re.compile(r'.\d+i'),
-    }
+    _NAME_STRIP_RE = re.compile(r'[^a-zA-Z0-9\s\-\(\)\[\]_.,]')
+    _NAME_ASCII_DELETE = bytes(char for char in range(128) if not (chr(char).isalnum() or chr(char).isspace() or chr(char) in '-()[]_.,'))
+    _NAME_COLLAPSE_RE = re.compile(r'[\s.-]+')
 
     def __init__(self, missing='~~', bad_fmt='!!'):
         self.missing, self.bad_fmt = missing, bad_fmt
@@ -50,9 +54,16 @@ class PartialFormatter(string.Formatter):
         if isinstance(value, str) and self.current_field == 'name':
             # 1. Aggressively sanitize to remove characters that cause issues on network shares.
             # This whitelist allows: letters, numbers, spaces, hyphens, parentheses, brackets, underscores, periods, commas.
-            sanitized_name = re.sub(r'[^a-zA-Z0-9\s\-\(\)\[\]_.,]', '', value)
+            # Plain ASCII names take the cheaper bytes.translate path, anything else falls back to the regex.
+            if value.isascii():
+                encoded = value.encode('ascii')
+                filtered = encoded.translate(None, self._NAME_ASCII_DELETE)
+                # Already clean names (nothing deleted) keep the original string rather than decoding a copy.
+                sanitized_name = value if len(filtered) == len(encoded) else filtered.decode('ascii')
+            else:
+                sanitized_name = self._NAME_STRIP_RE.sub('', value)
             # Collapse multiple spaces or hyphens into a single space for cleanliness.
-            sanitized_name = re.sub(r'[\s.-]+', ' ', sanitized_name).strip()
+            sanitized_name = self._NAME_COLLAPSE_RE.sub(' ', sanitized_name).strip()
 
             # 2. Truncate the now-safe name to a reasonable length.
             MAX_NAME_LENGTH = 180
@@ -62,18 +73,18 @@ class PartialFormatter(string.Formatter):
             value = sanitized_name  # Use the fully processed name for formatting.
 
         try:
-            if self.__regex['s'].match(format_spec):
-                value = value + format_spec[0] * int(format_spec[1:-1])
-                format_spec = ''
-            elif self.__regex['p'].match(format_spec):
-                value = format_spec[0] * int(format_spec[1:-1]) + value
-                format_spec = ''
-            elif self.__regex['i'].match(format_spec):
-                value = format_spec[0] * int(format_spec[1:-1]) + value + format_spec[0] * int(format_spec[1:-1])
+            # Padding specs are a fill character, a count and s(uffix)/p(refix)/i(nclose), like '.5s' or '_3p'.
+            if len(format_spec) >= 3 and format_spec[-1] in 'spi' and format_spec[1:-1].isdecimal():
+                padding = format_spec[0] * int(format_spec[1:-1])
+                if format_spec[-1] == 's':
+                    value = value + padding
+                elif format_spec[-1] == 'p':
+                    value = padding + value
+                else:
+                    value = padding + value + padding
                 format_spec = ''
             elif format_spec.startswith('|'):
-                template = Template(f'{{{{ val{format_spec} }}}}')
-                value = template.render(val=value)
+                value = _jinja_template(format_spec).render(val=value)
                 format_spec = ''
 
             return super().format_field(value, format_spec)
@@ -1,19 +1,84 @@
+import concurrent.futures
+import hashlib
+from contextlib import suppress
+from functools import lru_cache
+
+import orjson
 import requests
 from loguru import logger
-from typing import Optional, List, Any, Dict
+from orjson import JSONDecodeError
+from requests.adapters import HTTPAdapter
+from typing import Optional, List, Any, Dict, Tuple
+from urllib3.util.retry import Retry
 from namer.configuration import NamerConfig
 from namer.comparison_results import LookedUpFileInfo, SceneType, Performer
 from namer.fileinfo import FileInfo
 
-def __get_stash_headers(config: NamerConfig) -> Dict[str, str]:
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
-    if config.stash_api_key:
-        headers["ApiKey"] = config.stash_api_key
+# Shared session so batches of lookups reuse pooled keep-alive connections instead of a new handshake per call.
+_STASH_SESSION = requests.Session()
+_STASH_SESSION.headers.update({
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+})
+_STASH_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=frozenset(['POST'])))
+_STASH_SESSION.mount('http://', _STASH_ADAPTER)
+_STASH_SESSION.mount('https://', _STASH_ADAPTER)
+
+# StashDB urls that rejected a hash only (persisted) query, these always get the full query text.
+_STASH_APQ_UNSUPPORTED = set()
+
+@lru_cache(maxsize=8)
+def __get_stash_headers(api_key: Optional[str]) -> Dict[str, str]:
+    """
+    Per request headers, the json content headers are already set on the shared session.
+    """
+    headers = {}
+    if api_key:
+        headers["ApiKey"] = api_key
     return headers
 
+@lru_cache(maxsize=64)
+def __get_query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode('UTF-8')).hexdigest()
+
+def __is_persisted_query_not_found(body: Optional[Dict[str, Any]]) -> bool:
+    for error in (body or {}).get('errors') or []:
+        if isinstance(error, dict) and ((error.get('extensions') or {}).get('code') == 'PERSISTED_QUERY_NOT_FOUND' or error.get('message') == 'PersistedQueryNotFound'):
+            return True
+    return False
+
+def __post_stash(config: NamerConfig, payload: Dict[str, Any], headers: Dict[str, str]) -> Tuple[requests.Response, Optional[Dict[str, Any]]]:
+    response = _STASH_SESSION.post(config.stash_url, json=payload, headers=headers, timeout=10)
+    body = None
+    with suppress(JSONDecodeError):
+        body = orjson.loads(response.content)
+    return response, body if isinstance(body, dict) else None
+
+def __post_stash_query(query: str, variables: Dict[str, Any], config: NamerConfig) -> Tuple[requests.Response, Optional[Dict[str, Any]]]:
+    """
+    Posts a GraphQL query as an automatic persisted query: only the sha256 of the query is sent, and the full
+    text follows when the server has not cached it yet.   Servers that reject the hash only request get the
+    full query from then on.   Returns the response along with its decoded json body.
+    """
+    headers = __get_stash_headers(config.stash_api_key)
+    full_query = {'query': query, 'variables': variables}
+    if config.stash_url in _STASH_APQ_UNSUPPORTED:
+        return __post_stash(config, full_query, headers)
+
+    extensions = {'persistedQuery': {'version': 1, 'sha256Hash': __get_query_hash(query)}}
+    response, body = __post_stash(config, {'variables': variables, 'extensions': extensions}, headers)
+
+    if __is_persisted_query_not_found(body):
+        return __post_stash(config, {**full_query, 'extensions': extensions}, headers)
+
+    # Servers without persisted query support reject a query-less request, with wording that varies by server.
+    if 400 <= response.status_code < 500 or (body and body.get('errors') and not body.get('data')):
+        logger.debug(f"StashDB does not support persisted queries, sending full queries to {config.stash_url}")
+        _STASH_APQ_UNSUPPORTED.add(config.stash_url)
+        return __post_stash(config, full_query, headers)
+
+    return response, body
+
 def __map_stash_to_namer(data: Dict[str, Any]) -> LookedUpFileInfo:
     """
     Maps a StashDB JSON response to Namer's internal LookedUpFileInfo object.
@@ -104,15 +169,10 @@ def search_stash_by_oshash(oshash: str, config: NamerConfig) -> Optional[LookedU
     }
 
     try:
-        response = requests.post(
-            config.stash_url,
-            json={'query': query, 'variables': variables},
-            headers=__get_stash_headers(config),
-            timeout=10
-        )
+        response, json_data = __post_stash_query(query, variables, config)
         
         if response.status_code == 200:
-            json_data = response.json()
+            json_data = json_data or {}
             if json_data.get('data') and json_data['data'].get('findSceneByHash'):
                 scene_data = json_data['data']['findSceneByHash']
                 logger.info(f"Match found in StashDB: {scene_data.get('title')}")
@@ -127,6 +187,73 @@ def search_stash_by_oshash(oshash: str, config: NamerConfig) -> Optional[LookedU
 
     return None
 
+# Upper bound on aliased findSceneByHash queries sent in a single StashDB request.
+_STASH_BATCH_SIZE = 20
+
+_STASH_SCENE_FRAGMENT = """
+fragment SceneFields on Scene {
+  id
+  title
+  details
+  date
+  studio {
+    name
+  }
+  performers {
+    name
+    image_path
+  }
+  tags {
+    name
+  }
+  paths {
+    screenshot
+  }
+  images {
+    url
+  }
+}
+"""
+
+def search_stash_by_oshash_batch(oshashes: List[str], config: NamerConfig) -> List[Optional[LookedUpFileInfo]]:
+    """
+    Searches StashDB for many OSHashes at once, packing up to _STASH_BATCH_SIZE aliased findSceneByHash queries
+    in to each request.   The returned list lines up with the passed in hashes, with None where nothing matched.
+    """
+    results: List[Optional[LookedUpFileInfo]] = [None] * len(oshashes)
+    if not config.stash_enabled:
+        return results
+
+    pending = [(index, oshash) for index, oshash in enumerate(oshashes) if oshash]
+    for start in range(0, len(pending), _STASH_BATCH_SIZE):
+        chunk = pending[start:start + _STASH_BATCH_SIZE]
+        logger.info(f"Matching {len(chunk)} files against StashDB via OSHash")
+
+        parameters = ', '.join(f"$h{alias}: SceneHashInput!" for alias in range(len(chunk)))
+        selections = '\n'.join(f"  h{alias}: findSceneByHash(input: $h{alias}) {{ ...SceneFields }}" for alias in range(len(chunk)))
+        query = f"query FindScenesByHash({parameters}) {{\n{selections}\n}}\n{_STASH_SCENE_FRAGMENT}"
+        variables = {f"h{alias}": {"oshash": oshash} for alias, (_, oshash) in enumerate(chunk)}
+
+        try:
+            response, json_data = __post_stash_query(query, variables, config)
+
+            if response.status_code == 200:
+                data = (json_data or {}).get('data') or {}
+                matched = 0
+                for alias, (index, _) in enumerate(chunk):
+                    scene_data = data.get(f"h{alias}")
+                    if scene_data:
+                        results[index] = __map_stash_to_namer(scene_data)
+                        matched += 1
+                logger.info(f"StashDB matched {matched} of {len(chunk)} OSHashes")
+            else:
+                logger.warning(f"StashDB returned status {response.status_code}: {response.text}")
+
+        except Exception as e:
+            logger.error(f"Error querying StashDB: {e}")
+
+    return results
+
 def search_stash_by_query(file_info: FileInfo, config: NamerConfig) -> List[LookedUpFileInfo]:
     """
     Searches StashDB using a fuzzy string query (Site + Title).
@@ -176,16 +303,11 @@ def search_stash_by_query(file_info: FileInfo, config: NamerConfig) -> List[Look
     variables = {"term": search_term}
 
     try:
-        response = requests.post(
-            config.stash_url,
-            json={'query': query, 'variables': variables},
-            headers=__get_stash_headers(config),
-            timeout=10
-        )
+        response, json_data = __post_stash_query(query, variables, config)
 
         results = []
         if response.status_code == 200:
-            json_data = response.json()
+            json_data = json_data or {}
             if json_data.get('data') and json_data['data'].get('findScenes'):
                 scenes = json_data['data']['findScenes']['scenes']
                 logger.info(f"StashDB found {len(scenes)} potential matches via text query")
@@ -198,4 +320,22 @@ def search_stash_by_query(file_info: FileInfo, config: NamerConfig) -> List[Look
 
     except Exception as e:
         logger.error(f"Error querying StashDB: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def search_stash_many(file_infos: List[FileInfo], config: NamerConfig, max_workers: int = 8) -> List[List[LookedUpFileInfo]]:
+    """
+    Runs search_stash_by_query for many parsed files concurrently, the lookups are network bound so threads
+    sharing the pooled session overlap their waits.   The returned list lines up with the passed in files.
+    """
+    if not config.stash_enabled or not file_infos:
+        return [[] for _ in file_infos]
+
+    futures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file_info in file_infos:
+            futures.append(executor.submit(search_stash_by_query, file_info, config))
+
+    # Leaving the executor block waits for every lookup to finish.
+    results = [future.result() for future in futures]
+
+    return results
\ No newline at end of file
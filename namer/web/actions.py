@@ -5,6 +5,7 @@ Helper functions to tie in to namer's functionality.
 import gzip
 import math
 import shutil
+from dataclasses import fields
 from enum import Enum
 from functools import lru_cache
 from pathlib import Path
@@ -229,6 +230,16 @@ def read_failed_log_file(name: str, config: NamerConfig) -> Optional[ComparisonR
     return res
 
 
+def _fill_file_info_defaults(file_info: Optional[FileInfo]):
+    """
+    FileInfo uses __slots__, logs written before that only carry the fields that differed from their defaults.
+    """
+    if isinstance(file_info, FileInfo):
+        for file_info_field in fields(FileInfo):
+            if not hasattr(file_info, file_info_field.name):
+                setattr(file_info, file_info_field.name, file_info_field.default)
+
+
 @lru_cache(maxsize=1024)
 def _read_failed_log_file(file: Path, file_size: int, file_update: float) -> Optional[ComparisonResults]:
     res: Optional[ComparisonResults] = None
@@ -246,6 +257,9 @@ def _read_failed_log_file(file: Path, file_size: int, file_update: float) -> Opt
                 if not hasattr(item.looked_up, 'hashes'):
                     item.looked_up.hashes = []
 
+                _fill_file_info_defaults(getattr(item, 'name_parts', None))
+                _fill_file_info_defaults(item.looked_up.original_parsed_filename)
+
                 if item.looked_up.performers:
                     for performer in item.looked_up.performers:
                         if not hasattr(performer, 'alias'):
@@ -253,6 +267,7 @@ def _read_failed_log_file(file: Path, file_size: int, file_update: float) -> Opt
 
             if not hasattr(decoded, 'fileinfo'):
                 decoded.fileinfo = FileInfo()
+            _fill_file_info_defaults(decoded.fileinfo)
 
             res = decoded
 
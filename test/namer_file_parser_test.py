@@ -10,7 +10,7 @@ from unittest.mock import patch
 
 from loguru import logger
 
-from namer.fileinfo import parse_file_name
+from namer.fileinfo import name_cleaner, parse_file_name
 from namer.command import make_command
 from test import utils
 from test.utils import environment, sample_config
@@ -128,6 +128,53 @@ class UnitTestAsTheDefaultExecution(unittest.TestCase):
         self.assertEqual(name.trans, False)
         self.assertEqual(name.extension, 'mp4')
 
+    def test_parse_file_name_tpdb_id(self):
+        """
+        Test parsing a name carrying an explicit porndb id tag.
+        """
+        name = parse_file_name('EvilAngel.22.01.03.Carmela.Clutch [ThePornDBid=12345].mp4', sample_config())
+        self.assertEqual(name.tpdb_id, 12345)
+        self.assertEqual(name.extension, 'mp4')
+        self.assertEqual(name.site, None)
+
+        name = parse_file_name('EvilAngel.22.01.03.Carmela.Clutch.mp4', sample_config())
+        self.assertEqual(name.tpdb_id, None)
+
+    def test_parse_file_name_codes(self):
+        """
+        Test detection of jav codes and scene/movie ids, jav codes take priority.
+        """
+        name = parse_file_name('WEBDL-1080 did12 Some Title ssis-456.mp4', sample_config())
+        self.assertEqual(name.jav_code, 'SSIS-456')
+        self.assertEqual(name.code_type, 'JAV')
+
+        name = parse_file_name('Some.Title.DID-12.720p.mp4', sample_config())
+        self.assertEqual(name.jav_code, 'did-12')
+        self.assertEqual(name.code_type, 'SCENE_MOVIE_ID')
+
+        name = parse_file_name('Some.Title.milf-1080.mp4', sample_config())
+        self.assertEqual(name.jav_code, 'milf-1080')
+        self.assertEqual(name.code_type, 'SCENE_MOVIE_ID')
+
+        name = parse_file_name('Some.Title.did-720.mp4', sample_config())
+        self.assertEqual(name.jav_code, 'did-720')
+        self.assertEqual(name.code_type, 'SCENE_MOVIE_ID')
+
+        name = parse_file_name('EvilAngel.22.01.03.Carmela.Clutch.mp4', sample_config())
+        self.assertEqual(name.jav_code, None)
+        self.assertEqual(name.code_type, None)
+
+    def test_name_cleaner(self):
+        """
+        Test the single pass cleanup of resolution, fps and XXX tails from parsed names.
+        """
+        re_cleanup = sample_config().re_cleanup_combined
+        self.assertEqual(name_cleaner('Foo-..XXX-2160p', re_cleanup), 'Foo')
+        self.assertEqual(name_cleaner('Clutch-30fps-XXX-720p-.-30fps', re_cleanup), 'Clutch')
+        self.assertEqual(name_cleaner('Carmela.Clutch.Fabulous.Anal.3-Way.XXX.1080p.HEVC.x265', re_cleanup), 'Carmela Clutch Fabulous Anal 3-Way')
+        self.assertEqual(name_cleaner('Carmela Clutch [WEBDL-1080] 1920x1080 60fps 4k', re_cleanup), 'Carmela Clutch')
+        self.assertEqual(name_cleaner('part.1.720p', re_cleanup), 'part 1')
+
     @patch('sys.stdout', new_callable=io.StringIO)
     def test_parse_file(self, mock_stdout):
         """
@@ -0,0 +1,194 @@
+"""
+Test namer_stashdb_test.py
+"""
+
+import unittest
+from unittest import mock
+
+import orjson
+from loguru import logger
+
+from namer import stashdb
+from namer.fileinfo import FileInfo
+from test import utils
+
+
+def make_response(status_code: int, body) -> mock.MagicMock:
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.content = orjson.dumps(body)
+    response.text = response.content.decode('UTF-8')
+    return response
+
+
+def make_config(stash_url: str = 'http://stash.test/graphql') -> mock.MagicMock:
+    config = mock.MagicMock()
+    config.stash_enabled = True
+    config.stash_url = stash_url
+    config.stash_api_key = None
+    return config
+
+
+SCENE = {
+    'id': 'abc',
+    'title': 'Some Title',
+    'studio': {'name': 'Some Site'},
+    'performers': [],
+    'tags': [],
+}
+
+
+class UnitTestAsTheDefaultExecution(unittest.TestCase):
+    """
+    Always test first.
+    """
+
+    def __init__(self, method_name='runTest'):
+        super().__init__(method_name)
+
+        if not utils.is_debugging():
+            logger.remove()
+
+    def setUp(self):
+        stashdb._STASH_APQ_UNSUPPORTED.clear()
+
+    def test_persisted_query_success(self):
+        """
+        Test a cached persisted query is answered from the hash only request.
+        """
+        config = make_config()
+        success = make_response(200, {'data': {'findSceneByHash': SCENE}})
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=[success]) as post:
+            info = stashdb.search_stash_by_oshash('1234', config)
+        self.assertIsNotNone(info)
+        if info is not None:
+            self.assertEqual(info.name, 'Some Title')
+        self.assertEqual(post.call_count, 1)
+        self.assertNotIn('query', post.call_args.kwargs['json'])
+        self.assertNotIn(config.stash_url, stashdb._STASH_APQ_UNSUPPORTED)
+
+    def test_persisted_query_not_found(self):
+        """
+        Test an uncached persisted query is resent with the full query text and its hash.
+        """
+        config = make_config()
+        not_found = make_response(200, {'errors': [{'message': 'PersistedQueryNotFound', 'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'}}]})
+        success = make_response(200, {'data': {'findSceneByHash': SCENE}})
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=[not_found, success]) as post:
+            info = stashdb.search_stash_by_oshash('1234', config)
+        self.assertIsNotNone(info)
+        self.assertEqual(post.call_count, 2)
+        payload = post.call_args.kwargs['json']
+        self.assertIn('query', payload)
+        self.assertIn('persistedQuery', payload['extensions'])
+        self.assertNotIn(config.stash_url, stashdb._STASH_APQ_UNSUPPORTED)
+
+    def test_persisted_query_unsupported(self):
+        """
+        Test servers rejecting the hash only request are sent full queries from then on, whatever their wording.
+        """
+        rejections = [
+            make_response(400, {'errors': [{'message': 'Must provide query string.'}]}),
+            make_response(422, {'errors': [{'message': 'No GraphQL query found in the request'}]}),
+            make_response(200, {'errors': [{'message': 'operation  not found'}], 'data': None}),
+            make_response(400, 'Bad Request'),
+        ]
+        for number, rejection in enumerate(rejections):
+            config = make_config(f'http://stash{number}.test/graphql')
+            success = make_response(200, {'data': {'findSceneByHash': SCENE}})
+            with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=[rejection, success, success]) as post:
+                self.assertIsNotNone(stashdb.search_stash_by_oshash('1234', config))
+                self.assertIn(config.stash_url, stashdb._STASH_APQ_UNSUPPORTED)
+                payload = post.call_args.kwargs['json']
+                self.assertIn('query', payload)
+                self.assertNotIn('extensions', payload)
+
+                self.assertIsNotNone(stashdb.search_stash_by_oshash('1234', config))
+                self.assertEqual(post.call_count, 3)
+                self.assertNotIn('extensions', post.call_args.kwargs['json'])
+
+    def test_persisted_query_graphql_errors(self):
+        """
+        Test ordinary GraphQL errors alongside data are returned as is rather than resent.
+        """
+        config = make_config()
+        partial = make_response(200, {'data': {'findSceneByHash': SCENE}, 'errors': [{'message': 'not authorized for images'}]})
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=[partial]) as post:
+            self.assertIsNotNone(stashdb.search_stash_by_oshash('1234', config))
+        self.assertEqual(post.call_count, 1)
+        self.assertNotIn(config.stash_url, stashdb._STASH_APQ_UNSUPPORTED)
+
+    def test_search_by_oshash_batch(self):
+        """
+        Test batched hash lookups are chunked and line up with the passed in hashes, skipping empty ones.
+        """
+        config = make_config()
+        oshashes = ['' if index % 6 == 3 else f'hash{index}' for index in range(45)]
+        pending = [oshash for oshash in oshashes if oshash]
+        self.assertEqual(len(pending), 38)
+
+        def reply(_url, json, **_kwargs):
+            variables = json['variables']
+            return make_response(200, {'data': {alias: {**SCENE, 'title': value['oshash']} for alias, value in variables.items()}})
+
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=reply) as post:
+            results = stashdb.search_stash_by_oshash_batch(oshashes, config)
+
+        self.assertEqual([len(call.kwargs['json']['variables']) for call in post.call_args_list], [20, 18])
+        self.assertEqual(len(results), len(oshashes))
+        for oshash, result in zip(oshashes, results):
+            if oshash:
+                self.assertIsNotNone(result)
+                if result is not None:
+                    self.assertEqual(result.name, oshash)
+            else:
+                self.assertIsNone(result)
+
+    def test_search_by_oshash_batch_failures(self):
+        """
+        Test a failed chunk leaves its slots empty and partial data only fills the matched slots.
+        """
+        config = make_config()
+        stashdb._STASH_APQ_UNSUPPORTED.add(config.stash_url)
+        oshashes = [f'hash{index}' for index in range(25)]
+        failed = make_response(500, {'errors': [{'message': 'boom'}]})
+        partial = make_response(200, {'data': {'h1': {**SCENE, 'title': 'hash21'}, 'h3': None}})
+
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=[failed, partial]):
+            results = stashdb.search_stash_by_oshash_batch(oshashes, config)
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual([index for index, result in enumerate(results) if result is not None], [21])
+        result = results[21]
+        if result is not None:
+            self.assertEqual(result.name, 'hash21')
+
+        self.assertEqual(stashdb.search_stash_by_oshash_batch(['', ''], config), [None, None])
+
+    def test_search_stash_many(self):
+        """
+        Test concurrent text lookups line up with the passed in files, with a failed lookup left empty.
+        """
+        config = make_config()
+        stashdb._STASH_APQ_UNSUPPORTED.add(config.stash_url)
+        file_infos = [FileInfo(site='Site', name=f'Title {index}') for index in range(6)]
+
+        def reply(_url, json, **_kwargs):
+            term = json['variables']['term']
+            if term == 'Site Title 2':
+                raise ConnectionError('connection reset')
+            return make_response(200, {'data': {'findScenes': {'scenes': [{**SCENE, 'title': term}]}}})
+
+        with mock.patch.object(stashdb._STASH_SESSION, 'post', side_effect=reply):
+            results = stashdb.search_stash_many(file_infos, config, max_workers=3)
+
+        self.assertEqual(len(results), len(file_infos))
+        for index, result in enumerate(results):
+            if index == 2:
+                self.assertEqual(result, [])
+            else:
+                self.assertEqual([info.name for info in result], [f'Site Title {index}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test namer/web/actions.py
+"""
+
+import gzip
+import unittest
+from dataclasses import fields
+
+import orjson
+from loguru import logger
+
+from namer.fileinfo import FileInfo
+from namer.web.actions import read_failed_log_file
+from test import utils
+from test.utils import environment
+
+
+class UnitTestAsTheDefaultExecution(unittest.TestCase):
+    """
+    Always test first.
+    """
+
+    def __init__(self, method_name='runTest'):
+        super().__init__(method_name)
+
+        if not utils.is_debugging():
+            logger.remove()
+
+    def test_read_legacy_failed_log_file(self):
+        """
+        Test a log written before FileInfo had __slots__, carrying only part of its state, reads with defaults.
+        """
+        partial_file_info = {'py/object': 'namer.fileinfo.FileInfo', 'name': 'x', 'site': 's'}
+        legacy_log = {
+            'py/object': 'namer.comparison_results.ComparisonResults',
+            'results': [{
+                'py/object': 'namer.comparison_results.ComparisonResult',
+                'name': 'x',
+                'name_match': 100.0,
+                'site_match': True,
+                'date_match': False,
+                'name_parts': partial_file_info,
+                'looked_up': {
+                    'py/object': 'namer.comparison_results.LookedUpFileInfo',
+                    'name': 'x',
+                    'site': 's',
+                    'performers': [],
+                    'original_parsed_filename': partial_file_info,
+                },
+                'jav_code_match': False,
+            }],
+            'fileinfo': partial_file_info,
+        }
+
+        with environment() as (_path, _parrot, config):
+            (config.failed_dir / 'x_namer.json.gz').write_bytes(gzip.compress(orjson.dumps(legacy_log)))
+            results = read_failed_log_file('x.mp4', config)
+
+        self.assertIsNotNone(results)
+        if results is not None:
+            result = results.results[0]
+            for file_info in [results.fileinfo, result.name_parts, result.looked_up.original_parsed_filename]:
+                self.assertIsInstance(file_info, FileInfo)
+                self.assertEqual(file_info.name, 'x')
+                self.assertEqual(file_info.site, 's')
+                for file_info_field in fields(FileInfo):
+                    if file_info_field.name not in ['name', 'site']:
+                        self.assertEqual(getattr(file_info, file_info_field.name), file_info_field.default, file_info_field.name)
+
+
+if __name__ == '__main__':
+    unittest.main()